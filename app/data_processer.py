@@ -1,9 +1,6 @@
 import polars as pl
-from copy import deepcopy
-from collections import defaultdict
 import logging
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 class PonDictProcessor:
@@ -17,98 +14,133 @@ class PonDictProcessor:
         :param config: Configuration dictionary.
         """
         self.config = config
-
-    @staticmethod
-    def add_cvlan_data(pon_dict: dict, config: dict) -> tuple:
+        self._lookup_df = pl.read_csv(config["tmo_circuits"]["tmo_lookup_path"])
+        self._address_df = pl.read_excel(config["site_lookup"]["df_of_sites_dir"])
+
+        tower_column = config["tmo_circuits"]["tmo_columns_mapping"]["tower_column"]
+        self._tower_counts = dict(
+            self._lookup_df
+            .group_by(pl.col(tower_column).cast(pl.Utf8))
+            .agg(pl.len().alias("n"))
+            .iter_rows()
+        )
+
+    def add_cvlan_data(self, pon_dict: dict) -> tuple:
         """
         Adds CVLAN data to the dictionary using the lookup DataFrame.
 
         :param pon_dict: Dictionary containing pon data.
-        :param config: Configuration dictionary.
         :return: Updated dictionary and list of suspicious tower numbers.
         """
-        pon_dict = deepcopy(pon_dict)
+        pon_dict = {key: dict(value) for key, value in pon_dict.items()}
         suspicious_towers = []
-        columns_mapping = config["tmo_circuits"]["tmo_columns_mapping"]
-        lookup_df = pl.read_csv(config["tmo_circuits"]["tmo_lookup_path"])
+        columns_mapping = self.config["tmo_circuits"]["tmo_columns_mapping"]
+
+        pon_df = pl.DataFrame(
+            {
+                "site": list(pon_dict.keys()),
+                "tower": [value["tower_name"] for value in pon_dict.values()],
+                "evc1": [value["evc1"] for value in pon_dict.values()],
+                "evc2": [value["evc2"] for value in pon_dict.values()],
+            },
+            schema={"site": pl.Utf8, "tower": pl.Utf8, "evc1": pl.Utf8, "evc2": pl.Utf8},
+        )
 
-        for key, value in pon_dict.items():
-            tower_name = value["tower_name"]
+        try:
+            cvlan_df = self._get_cvlan_df(self._lookup_df, columns_mapping)
+            join_keys = [columns_mapping["tower_column"], columns_mapping["evc_column"]]
+            joined = (
+                pon_df
+                .join(cvlan_df.rename({"cvlan": "cvlan1", "matches": "matches1"}),
+                      left_on=["tower", "evc1"], right_on=join_keys, how="left")
+                .join(cvlan_df.rename({"cvlan": "cvlan2", "matches": "matches2"}),
+                      left_on=["tower", "evc2"], right_on=join_keys, how="left")
+            )
+        except Exception as e:
+            logger.error("Error retrieving CVLAN data: %s", e)
+            return pon_dict, list(dict.fromkeys(value["tower_name"] for value in pon_dict.values()))
 
-            cvlan_evc1 = PonDictProcessor._get_cvlan(lookup_df, columns_mapping, tower_name, value["evc1"], "evc1", suspicious_towers)
-            cvlan_evc2 = PonDictProcessor._get_cvlan(lookup_df, columns_mapping, tower_name, value["evc2"], "evc2", suspicious_towers)
+        for row in joined.iter_rows(named=True):
+            key = row["site"]
+            # A CVLAN is only trusted if the (tower, EVC) pair is unique in the lookup
+            cvlan_evc1 = row["cvlan1"] if row["matches1"] == 1 else None
+            cvlan_evc2 = row["cvlan2"] if row["matches2"] == 1 else None
+            if (row["matches1"] or 0) > 1 or (row["matches2"] or 0) > 1:
+                suspicious_towers.append(row["tower"])
 
             # Combine CVLAN values
             combined_cvlan = f"{cvlan_evc1 or ''}/{cvlan_evc2 or ''}".strip("/")
             if combined_cvlan:
-                value["cvlan"] = combined_cvlan
+                pon_dict[key]["cvlan"] = combined_cvlan
             else:
-                logger.info(f"No CVLAN found for site: {key}")
+                logger.info("No CVLAN found for site: %s", key)
 
         return pon_dict, suspicious_towers
 
     @staticmethod
-    def _get_cvlan(lookup_df, columns_mapping, tower_name, evc_value, evc_key, suspicious_towers):
+    def _get_cvlan_df(lookup_df, columns_mapping) -> pl.DataFrame:
         """
-        Retrieves CVLAN value for a specific tower and EVC.
+        Groups the lookup DataFrame by tower and EVC.
 
         :param lookup_df: Polars DataFrame for CVLAN lookup.
         :param columns_mapping: Column name mapping from configuration.
-        :param tower_name: Name of the tower.
-        :param evc_value: EVC value to search.
-        :param evc_key: Key indicating EVC type (evc1 or evc2).
-        :param suspicious_towers: List to collect suspicious towers.
-        :return: CVLAN value or None.
+        :return: DataFrame with tower, EVC, first CVLAN ("cvlan") and number of rows ("matches").
         """
-        try:
-            result = lookup_df.filter([
-                pl.col(columns_mapping["tower_column"]) == tower_name,
-                pl.col(columns_mapping["evc_column"]) == evc_value
-            ])["CVLAN"]
-            return result.item() if len(result) == 1 else None
-        except Exception as e:
-            logger.error(f"Error retrieving CVLAN for {evc_key} at {tower_name}: {e}")
-            suspicious_towers.append(tower_name)
-            return None
-
-    @staticmethod
-    def add_address_data(pon_dict: dict, config: dict) -> dict:
+        tower_column, evc_column = columns_mapping["tower_column"], columns_mapping["evc_column"]
+        return (
+            lookup_df
+            .select(pl.col(tower_column).cast(pl.Utf8), pl.col(evc_column).cast(pl.Utf8), pl.col("CVLAN"))
+            .group_by([tower_column, evc_column])
+            .agg(pl.col("CVLAN").first().alias("cvlan"), pl.len().alias("matches"))
+        )
+
+    def add_address_data(self, pon_dict: dict) -> dict:
         """
         Adds address data to the dictionary using the site lookup DataFrame.
 
         :param pon_dict: Dictionary containing pon data.
-        :param config: Configuration dictionary.
         :return: Updated dictionary with address data.
         """
-        pon_dict = deepcopy(pon_dict)
-        address_df = pl.read_excel(config["site_lookup"]["df_of_sites_dir"])
+        pon_dict = {key: dict(value) for key, value in pon_dict.items()}
+        site_column = self.config["site_lookup"]["site_column_name"]
+        sites_df = pl.DataFrame({site_column: list(pon_dict.keys())}, schema={site_column: pl.Utf8})
 
-        for key, value in pon_dict.items():
-            try:
-                site_info = address_df.filter(pl.col("Site Name") == key).row(0, named=True)
-                value.update(site_info)
-                value.pop("Site Name", None)
-            except Exception as e:
-                logger.warning(f"No address data found for site: {key} - {e}")
+        try:
+            # Only the first row of a site is used, the indicator column tells matched sites apart
+            address_df = (
+                self._address_df
+                .with_columns(pl.col(site_column).cast(pl.Utf8))
+                .unique(subset=site_column, keep="first", maintain_order=True)
+                .with_columns(pl.lit(True).alias("_matched"))
+            )
+            joined = sites_df.join(address_df, on=site_column, how="left")
+        except Exception as e:
+            logger.error("Error retrieving address data: %s", e)
+            for key in pon_dict:
+                logger.warning("No address data found for site: %s", key)
+            return pon_dict
+
+        for row in joined.iter_rows(named=True):
+            key = row.pop(site_column)
+            if not row.pop("_matched"):
+                logger.warning("No address data found for site: %s", key)
+                continue
+            pon_dict[key].update({column: value for column, value in row.items() if value is not None})
         return pon_dict
 
-    @staticmethod
-    def sort_by_type(pon_dict: dict, config: dict) -> dict:
+    def sort_by_type(self, pon_dict: dict) -> dict:
         """
         Sorts pon_dict by type into pdisc, fdisc, and no_type.
 
         :param pon_dict: Dictionary containing pon data.
-        :param config: Configuration dictionary.
         :return: Sorted dictionary by type.
         """
-        lookup_df = pl.read_csv(config["tmo_circuits"]["tmo_lookup_path"])
         sorted_dict = {"pdisc": {"vlan": {}, "unievc": {}}, "fdisc": {}, "no_type": {}}
 
         for key, value in pon_dict.items():
-            tower_filter = lookup_df.filter(pl.col("Tower Name") == key)
             uni, evc1, evc2 = value.get("uni"), value.get("evc1"), value.get("evc2")
 
-            if len(tower_filter) > 2:
+            if self._tower_counts.get(key, 0) > 2:
                 if uni and evc1 and evc2:
                     sorted_dict["pdisc"]["unievc"][key] = value
                 elif evc1 and evc2 and not uni:
@@ -131,20 +163,20 @@ class PonDictProcessor:
         :param pon_dict: Dictionary containing pon data.
         :return: Dictionary grouped by 'date_sent'.
         """
-        grouped_dict = defaultdict(lambda: defaultdict(dict))
+        grouped_dict = {"unievc": {}, "vlan": {}, "fdisc": {}, "no_type": {}}
 
         def group_entries(entries, target):
             for key, value in entries.items():
                 date_sent = value.get("date_sent")
                 if date_sent:
-                    target[date_sent][key] = value
+                    target.setdefault(date_sent, {})[key] = value
 
         for section in ["unievc", "vlan"]:
             group_entries(pon_dict.get("pdisc", {}).get(section, {}), grouped_dict[section])
         for section in ["fdisc", "no_type"]:
             group_entries(pon_dict.get(section, {}), grouped_dict[section])
 
-        return {section: dict(data) for section, data in grouped_dict.items()}
+        return grouped_dict
 
     def process(self, pon_dict: dict) -> dict:
         """
@@ -157,12 +189,12 @@ class PonDictProcessor:
         :return: Final processed dictionary.
         """
         logger.info("Starting PON dictionary processing...")
-        pon_dict, suspicious_towers = self.add_cvlan_data(pon_dict, self.config)
+        pon_dict, suspicious_towers = self.add_cvlan_data(pon_dict)
         if suspicious_towers:
-            logger.warning(f"Suspicious towers encountered: {suspicious_towers}")
+            logger.warning("Suspicious towers encountered: %s", suspicious_towers)
 
-        pon_dict = self.add_address_data(pon_dict, self.config)
-        sorted_by_type = self.sort_by_type(pon_dict, self.config)
+        pon_dict = self.add_address_data(pon_dict)
+        sorted_by_type = self.sort_by_type(pon_dict)
         sorted_by_date = self.sort_by_date(sorted_by_type)
 
         logger.info("PON dictionary processing completed.")
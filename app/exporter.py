@@ -1,15 +1,37 @@
-from openpyxl import load_workbook
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import PatternFill
+from openpyxl.styles.colors import COLOR_INDEX
+from openpyxl.worksheet.dimensions import ColumnDimension, RowDimension
+from openpyxl.worksheet.page import PrintPageSetup
+from openpyxl.utils.cell import column_index_from_string
+import xlsxwriter
+from copy import copy
+from itertools import zip_longest
 import logging
+import re
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
+_CELL_RE = re.compile(r"([A-Z]+)(\d+)")
+
+# openpyxl style names to their xlsxwriter equivalents
+_BORDER_STYLES = {"thin": 1, "medium": 2, "dashed": 3, "dotted": 4, "thick": 5, "double": 6, "hair": 7,
+                  "mediumDashed": 8, "dashDot": 9, "mediumDashDot": 10, "dashDotDot": 11,
+                  "mediumDashDotDot": 12, "slantDashDot": 13}
+_UNDERLINES = {"single": 1, "double": 2, "singleAccounting": 33, "doubleAccounting": 34}
+_HORIZONTAL_ALIGNMENTS = {"left": "left", "center": "center", "right": "right", "fill": "fill",
+                          "justify": "justify", "centerContinuous": "center_across", "distributed": "distributed"}
+_VERTICAL_ALIGNMENTS = {"top": "top", "center": "vcenter", "bottom": "bottom", "justify": "vjustify",
+                        "distributed": "vdistributed"}
+
 
 class Exporter:
     """
     A class to export data into an Excel template and create a new file.
     Highlights rows in red if a specific column (e.g., AG) is empty and other values are present.
+    Cell values and styles, sheet layout, conditional formatting, print and page settings and defined names
+    are carried over from the template; images, charts, tables, comments and hyperlinks are not.
     """
 
     def __init__(self, config: dict):
@@ -21,6 +43,14 @@ class Exporter:
         self.template_path = config["config_templates"]["path"]["bawa"]
         self.cell_mapping = config["cell_mapping"]
         self.highlight_color = config.get("highlight", {}).get("empty_ag_color", "FF0000")  # Default red
+        self._highlight_fill = PatternFill(start_color=self.highlight_color, end_color=self.highlight_color,
+                                           fill_type="solid")
+        self._parsed_mapping = {sheet_name: self._parse_sheet_mapping(sheet_mapping)
+                                for sheet_name, sheet_mapping in self.cell_mapping.items()}
+        self._free_rows, self._row_width = {}, {}
+        # Template content read once: rows of (value, style_id) pairs, distinct styles and sheet layouts
+        self._template_rows, self._layouts, self._styles = {}, {}, {}
+        self._load_template()
         logger.info("Exporter initialized with template path and output configuration.")
 
     def _get_column_and_start_row(self, sheet_mapping: dict, target_key: str) -> tuple:
@@ -33,73 +63,383 @@ class Exporter:
         """
         for cell, key in sheet_mapping.items():
             if key == target_key:
-                column = ''.join(filter(str.isalpha, cell))  # Extract letters (e.g., "AG")
-                start_row = int(''.join(filter(str.isdigit, cell)))  # Extract digits (e.g., 14)
-                return column, start_row
+                match = _CELL_RE.match(cell)  # e.g. "AG14" -> ("AG", "14")
+                return match.group(1), int(match.group(2))
         raise ValueError(f"Column for '{target_key}' not found in the cell mapping.")
 
     @staticmethod
-    def _highlight_row(sheet, row: int, color: str):
+    def _parse_sheet_mapping(sheet_mapping: dict) -> list:
         """
-        Highlights an entire row with a specified color.
+        Converts a cell-to-key mapping into (column_letter, column_index, row, key) tuples ordered by column.
 
-        :param sheet: The worksheet object.
-        :param row: Row number to highlight.
-        :param color: Color code for highlighting (hex format, e.g., "FF0000").
+        :param sheet_mapping: Dictionary of cell-to-key mapping for a sheet.
+        :return: List of (column_letter, column_index, row, key) tuples.
         """
-        red_fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
-        for col in range(1, sheet.max_column + 1):
-            cell = sheet.cell(row=row, column=col)
-            cell.fill = red_fill
+        parsed = [(column_letter, column_index_from_string(column_letter), int(row), key)
+                  for cell, key in sheet_mapping.items()
+                  for column_letter, row in [_CELL_RE.match(cell).groups()]]
+        return sorted(parsed, key=lambda item: item[1])
 
-    def export(self, data: dict, output_path: str) -> None:
+    def _load_template(self):
         """
-        Exports data into the Excel template.
-
-        :param data: Dictionary containing the data to export.
-        :param output_path: Path to save the resulting Excel file.
+        Reads the template once into plain rows, styles and layouts, and caches, for every mapped sheet,
+        the rows from the start row on that are free for data. The workbook itself is not kept.
         """
         logger.info("Loading Excel template...")
         workbook = load_workbook(self.template_path)
+        for sheet in workbook.worksheets:
+            self._template_rows[sheet.title] = [tuple(self._read_cell(cell) for cell in row)
+                                                for row in sheet.iter_rows()]
+            self._layouts[sheet.title] = self._read_layout(sheet)
+        self._defined_names = [copy(defined_name) for defined_name in workbook.defined_names.values()]
+        self._active_index = workbook.index(workbook.active) if workbook.active in workbook.worksheets else 0
 
         for sheet_name, sheet_mapping in self.cell_mapping.items():
             if sheet_name not in workbook.sheetnames:
-                logger.error(f"Sheet '{sheet_name}' not found in the template.")
+                logger.error("Sheet '%s' not found in the template.", sheet_name)
                 continue
 
-            sheet = workbook[sheet_name]
-            logger.info(f"Processing sheet: {sheet_name}")
-
             try:
-                ag_column, start_row = self._get_column_and_start_row(sheet_mapping, "cvlan")
+                _, start_row = self._get_column_and_start_row(sheet_mapping, "cvlan")
             except ValueError as e:
                 logger.error(e)
                 continue
 
-            current_row = start_row
+            # Checking if the line is filled, on the first letter of every mapped cell like the original probe
+            probe_indexes = sorted({column_index_from_string(cell[:1]) for cell in sheet_mapping})
+            self._free_rows[sheet_name] = [
+                row_idx for row_idx, row in enumerate(self._template_rows[sheet_name][start_row - 1:], start_row)
+                if not any(col_index <= len(row) and row[col_index - 1][0] is not None for col_index in probe_indexes)
+            ]
+            column_indexes = [col_index for _, col_index, _, _ in self._parsed_mapping[sheet_name]]
+            self._row_width[sheet_name] = max(workbook[sheet_name].max_column or 0, column_indexes[-1])
+
+    def _read_cell(self, cell) -> tuple:
+        """
+        Reads a template cell as a (value, style_id) pair, copying each distinct style once.
+
+        :param cell: Cell from the template.
+        :return: Tuple (value, style_id), style_id is None for unstyled cells.
+        """
+        if not cell.has_style:
+            return cell.value, None
+        style_id = cell.style_id
+        if style_id not in self._styles:
+            self._styles[style_id] = (copy(cell.font), copy(cell.fill), copy(cell.border), copy(cell.alignment),
+                                      cell.number_format, copy(cell.protection))
+        return cell.value, style_id
+
+    @staticmethod
+    def _read_layout(sheet) -> dict:
+        """
+        Reads the layout of a template sheet into plain data, so it does not hold on to the template.
+
+        :param sheet: Worksheet from the template.
+        :return: Dictionary of layout settings.
+        """
+        return {
+            "column_dimensions": {key: {"width": dim.width, "bestFit": dim.bestFit, "hidden": dim.hidden,
+                                        "outlineLevel": dim.outlineLevel, "collapsed": dim.collapsed,
+                                        "min": dim.min, "max": dim.max}
+                                  for key, dim in sheet.column_dimensions.items()},
+            "row_dimensions": {index: {"ht": dim.ht, "hidden": dim.hidden, "outlineLevel": dim.outlineLevel,
+                                       "collapsed": dim.collapsed}
+                               for index, dim in sheet.row_dimensions.items()},
+            "merged_cells": [merged_range.coord for merged_range in sheet.merged_cells.ranges],
+            "data_validations": [copy(validation) for validation in sheet.data_validations.dataValidation],
+            "conditional_formatting": sheet.conditional_formatting,
+            "auto_filter": copy(sheet.auto_filter),
+            "freeze_panes": sheet.freeze_panes,
+            "sheet_state": sheet.sheet_state,
+            "sheet_properties": copy(sheet.sheet_properties),
+            "protection": copy(sheet.protection),
+            "print_title_rows": sheet.print_title_rows,
+            "print_title_cols": sheet.print_title_cols,
+            "print_area": sheet.print_area,
+            # The page setup keeps a reference to its sheet, only its settings are read
+            "page_setup": {attr: getattr(sheet.page_setup, attr) for attr in PrintPageSetup.__attrs__},
+            "page_margins": copy(sheet.page_margins),
+            "print_options": copy(sheet.print_options),
+            "header_footer": copy(sheet.HeaderFooter),
+            "defined_names": [copy(defined_name) for defined_name in sheet.defined_names.values()],
+        }
+
+    def _iter_rows(self, sheet_name: str, data: dict):
+        """
+        Walks a template sheet row by row with the data laid over it. Data rows take the free template
+        rows of a mapped sheet in order and continue after the last template row, so every template row is kept.
+
+        :param sheet_name: Name of the template sheet.
+        :param data: Dictionary containing the data to export.
+        :return: Iterator of (row number, template row, row values or None, highlight) tuples.
+        """
+        template_rows = self._template_rows[sheet_name]
+
+        # Sheets without a usable mapping are carried over unchanged
+        if sheet_name not in self._free_rows:
+            for row_idx, template_row in enumerate(template_rows, 1):
+                yield row_idx, template_row, None, False
+            return
+
+        parsed_mapping = self._parsed_mapping[sheet_name]
+        row_width = self._row_width[sheet_name]
+        ag_column, start_row = self._get_column_and_start_row(self.cell_mapping[sheet_name], "cvlan")
+        ag_index = column_index_from_string(ag_column) - 1
+
+        # A template ending above the start row still gets its data from the start row on
+        last_row = max(len(template_rows), start_row - 1)
+        free_rows = iter(self._free_rows[sheet_name])
+        data_rows = {}
+        for row_data in data.values():
+            row_idx = next(free_rows, None)
+            if row_idx is None:
+                last_row += 1
+                row_idx = last_row
+            data_rows[row_idx] = row_data
+
+        for row_idx in range(1, last_row + 1):
+            template_row = template_rows[row_idx - 1] if row_idx <= len(template_rows) else ()
+            row_data = data_rows.get(row_idx)
+            if row_data is None:
+                yield row_idx, template_row, None, False
+                continue
+
+            # Inserting data by column index over the template values
+            values = [value for value, _ in template_row] + [None] * (row_width - len(template_row))
+            row_filled = False
+            for _, col_index, _, key in parsed_mapping:
+                value = row_data.get(key)
+                if value is not None:
+                    values[col_index - 1] = value
+                    row_filled = True
+
+            # String highlighting if cvlan (AG) is empty, but other cells are populated
+            highlight = values[ag_index] is None and row_filled
+            if highlight:
+                logger.warning("Highlighting row %s due to empty '%s' column.", row_idx, ag_column)
+            yield row_idx, template_row, values, highlight
+
+    @staticmethod
+    def _copy_layout(layout: dict, target):
+        """
+        Replays the layout of a template sheet on a write-only sheet: dimensions, merged ranges, data validations,
+        conditional formatting, frozen panes, visibility, sheet properties, print and page settings and sheet-scoped
+        names. Runs before the first append.
+
+        :param layout: Layout settings read from the template sheet.
+        :param target: The write-only worksheet object.
+        """
+        # Dimensions are rebuilt without their style, style indexes belong to the template workbook
+        for key, settings in layout["column_dimensions"].items():
+            target.column_dimensions[key] = ColumnDimension(target, index=key, **settings)
+        for index, settings in layout["row_dimensions"].items():
+            target.row_dimensions[index] = RowDimension(target, index=index, **settings)
+        for coord in layout["merged_cells"]:
+            target.merged_cells.add(coord)
+        for validation in layout["data_validations"]:
+            target.data_validations.append(copy(validation))
+        # Shared by every export, the writer only assigns the differential style ids of its rules
+        target.conditional_formatting = layout["conditional_formatting"]
+        target.auto_filter = copy(layout["auto_filter"])
+        target.freeze_panes = layout["freeze_panes"]
+        target.sheet_state = layout["sheet_state"]
+        target.sheet_properties = copy(layout["sheet_properties"])
+        target.protection = copy(layout["protection"])
+        target.print_title_rows = layout["print_title_rows"]
+        target.print_title_cols = layout["print_title_cols"]
+        target.print_area = layout["print_area"]
+        target.page_setup = PrintPageSetup(worksheet=target, **layout["page_setup"])
+        target.page_margins = copy(layout["page_margins"])
+        target.print_options = copy(layout["print_options"])
+        target.HeaderFooter = copy(layout["header_footer"])
+        for defined_name in layout["defined_names"]:
+            target.defined_names.add(copy(defined_name))
+
+    def _build_cell(self, sheet, styles: dict, value, style_id, highlight: bool):
+        """
+        Builds a write-only cell holding value with a template style. Each distinct style is registered
+        in the new workbook once, later cells share its style array.
+
+        :param sheet: The write-only worksheet object.
+        :param styles: Style arrays registered in this workbook, keyed by (style_id, highlight).
+        :param value: Cell value.
+        :param style_id: Template style of the cell, None for unstyled cells.
+        :param highlight: Whether the row is highlighted.
+        :return: WriteOnlyCell or plain value.
+        """
+        if style_id is None and not highlight:
+            return value
+        cell = WriteOnlyCell(sheet, value=value)
+        key = (style_id, highlight)
+        if key in styles:
+            cell._style = styles[key]
+            return cell
+        if style_id is not None:
+            (cell.font, cell.fill, cell.border, cell.alignment,
+             cell.number_format, cell.protection) = self._styles[style_id]
+        if highlight:
+            cell.fill = self._highlight_fill
+        styles[key] = cell._style
+        return cell
+
+    def export(self, data: dict, output_path: str) -> None:
+        """
+        Exports data into a new workbook built from the template sheets.
 
-            for row_data in data.values():
-                # Checking if the line is filled
-                while any(sheet[f"{col}{current_row}"].value is not None
-                          for col in [cell[:1] for cell in sheet_mapping.keys()]):
-                    current_row += 1
+        :param data: Dictionary containing the data to export.
+        :param output_path: Path to save the resulting Excel file.
+        """
+        workbook = Workbook(write_only=True)
+        for defined_name in self._defined_names:
+            workbook.defined_names.add(copy(defined_name))
+        styles = {}
 
-                # Inserting data into cells
-                row_filled = False
-                for cell, key in sheet_mapping.items():
-                    column_letter = ''.join(filter(str.isalpha, cell))
-                    if key in row_data and row_data[key] is not None:
-                        sheet[f"{column_letter}{current_row}"] = row_data[key]
-                        row_filled = True
+        for sheet_name, layout in self._layouts.items():
+            sheet = workbook.create_sheet(sheet_name)
+            self._copy_layout(layout, sheet)
+            if sheet_name in self._free_rows:
+                logger.info("Processing sheet: %s", sheet_name)
 
-                # String highlighting if cvlan (AG) is empty, but other cells are populated
-                ag_cell = sheet[f"{ag_column}{current_row}"]
-                if ag_cell.value is None and row_filled:
-                    logger.warning(f"Highlighting row {current_row} due to empty '{ag_column}' column.")
-                    self._highlight_row(sheet, current_row, self.highlight_color)
+            for _, template_row, values, highlight in self._iter_rows(sheet_name, data):
+                if values is None:
+                    values = [value for value, _ in template_row]
+                sheet.append([self._build_cell(sheet, styles, value, style_id, highlight)
+                              for value, (_, style_id) in zip_longest(values, template_row, fillvalue=(None, None))])
 
-                current_row += 1
+        workbook.active = self._active_index
 
         # Сохранение Excel-файла
         workbook.save(output_path)
-        logger.info(f"Excel file successfully saved at {output_path}.")
+        logger.info("Excel file successfully saved at %s.", output_path)
+
+
+class XlsxWriterExporter(Exporter):
+    """
+    An Exporter variant that streams rows with xlsxwriter in constant_memory mode.
+    Reuses the template rows and column mapping cached by Exporter. Cell formats, column widths,
+    row heights, frozen panes and hidden sheets are carried over; merged ranges, data validations,
+    conditional formatting, defined names, print titles and areas, page setup, tab colors and the
+    other sheet properties are not, nor is anything the Exporter itself drops.
+    """
+
+    def export(self, data: dict, output_path: str) -> None:
+        """
+        Exports data into a new workbook built from the template sheets.
+
+        :param data: Dictionary containing the data to export.
+        :param output_path: Path to save the resulting Excel file.
+        """
+        workbook = xlsxwriter.Workbook(output_path, {"constant_memory": True, "strings_to_numbers": False})
+        formats = {}
+
+        for sheet_name, layout in self._layouts.items():
+            sheet = workbook.add_worksheet(sheet_name)
+            self._copy_sheet_layout(layout, sheet)
+            if sheet_name in self._free_rows:
+                logger.info("Processing sheet: %s", sheet_name)
+
+            for row_idx, template_row, values, highlight in self._iter_rows(sheet_name, data):
+                # Rows and columns are zero-based in xlsxwriter
+                row_dimension = layout["row_dimensions"].get(row_idx)
+                if row_dimension is not None and (row_dimension["ht"] or row_dimension["hidden"]):
+                    sheet.set_row(row_idx - 1, row_dimension["ht"], None, {"hidden": row_dimension["hidden"]})
+
+                if values is None:
+                    values = [value for value, _ in template_row]
+                for col, (value, (_, style_id)) in enumerate(zip_longest(values, template_row,
+                                                                         fillvalue=(None, None))):
+                    cell_format = self._get_format(workbook, formats, style_id, highlight)
+                    if value is not None or cell_format is not None:
+                        sheet.write(row_idx - 1, col, value, cell_format)
+
+        # xlsxwriter will not hide the active sheet, the template one is kept only while visible
+        visible_indexes = [index for index, layout in enumerate(self._layouts.values())
+                           if layout["sheet_state"] == "visible"]
+        active_index = self._active_index
+        if active_index not in visible_indexes and visible_indexes:
+            active_index = visible_indexes[0]
+        workbook.worksheets()[active_index].activate()
+
+        workbook.close()
+        logger.info("Excel file successfully saved at %s.", output_path)
+
+    @staticmethod
+    def _copy_sheet_layout(layout: dict, target):
+        """
+        Replays column widths, frozen panes and visibility of a template sheet on an xlsxwriter sheet.
+
+        :param layout: Layout settings read from the template sheet.
+        :param target: The xlsxwriter worksheet object.
+        """
+        for key, dim in layout["column_dimensions"].items():
+            if dim["width"] or dim["hidden"]:
+                first_col = (dim["min"] or column_index_from_string(key)) - 1
+                last_col = (dim["max"] or first_col + 1) - 1
+                target.set_column(first_col, last_col, dim["width"] or None, None, {"hidden": dim["hidden"]})
+        if layout["freeze_panes"]:
+            target.freeze_panes(layout["freeze_panes"])
+        if layout["sheet_state"] != "visible":
+            target.hide()
+
+    def _get_format(self, workbook, formats: dict, style_id, highlight: bool):
+        """
+        Returns the xlsxwriter format of a template style, creating it once per distinct style.
+
+        :param workbook: The xlsxwriter workbook object.
+        :param formats: Cache of formats created for this workbook.
+        :param style_id: Template style of the cell, None for unstyled cells.
+        :param highlight: Whether the row is highlighted.
+        :return: Format object or None for unstyled cells.
+        """
+        key = (style_id, highlight)
+        if key not in formats:
+            properties = self._format_properties(self._styles[style_id]) if style_id is not None else {}
+            if highlight:
+                properties["bg_color"] = f"#{self.highlight_color[-6:]}"
+            formats[key] = workbook.add_format(properties) if properties else None
+        return formats[key]
+
+    @classmethod
+    def _format_properties(cls, style: tuple) -> dict:
+        """
+        Translates the font, fill, border, alignment and number format of a template style
+        into xlsxwriter format properties.
+
+        :param style: Tuple (font, fill, border, alignment, number_format, protection) from the template.
+        :return: Dictionary of format properties.
+        """
+        font, fill, border, alignment, number_format, _ = style
+        properties = {
+            "font_name": font.name, "font_size": font.sz, "bold": font.b, "italic": font.i,
+            "font_strikeout": font.strike, "underline": _UNDERLINES.get(font.u),
+            "font_color": cls._convert_color(font.color),
+            "align": _HORIZONTAL_ALIGNMENTS.get(alignment.horizontal),
+            "valign": _VERTICAL_ALIGNMENTS.get(alignment.vertical),
+            "text_wrap": alignment.wrap_text, "indent": alignment.indent, "rotation": alignment.textRotation,
+        }
+        if fill.fill_type == "solid":
+            properties["bg_color"] = cls._convert_color(fill.fgColor)
+        for side_name in ("left", "right", "top", "bottom"):
+            side = getattr(border, side_name)
+            if side is not None and side.style:
+                properties[side_name] = _BORDER_STYLES.get(side.style, 1)
+                properties[f"{side_name}_color"] = cls._convert_color(side.color)
+        if number_format != "General":
+            properties["num_format"] = number_format
+        return {key: value for key, value in properties.items() if value}
+
+    @staticmethod
+    def _convert_color(color):
+        """
+        Converts an openpyxl color into an xlsxwriter color string. Theme colors are not resolved.
+
+        :param color: openpyxl Color object or None.
+        :return: Color string (e.g. "#FF0000") or None.
+        """
+        if color is None:
+            return None
+        if color.type == "rgb" and isinstance(color.rgb, str):
+            return f"#{color.rgb[-6:]}"
+        if color.type == "indexed" and color.indexed < len(COLOR_INDEX):
+            return f"#{COLOR_INDEX[color.indexed][-6:]}"
+        return None
@@ -1,11 +1,14 @@
 import os
 import re
+import shutil
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from extract_msg import Message 
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
+_PON_RE = re.compile(r"PON_([\w\d]+)")
+
 
 class FileManager:
     """
@@ -27,9 +30,9 @@ class FileManager:
         os.makedirs(self.tmp_dir, exist_ok=True)
         
         logger.info("FileManager initialized.")
-        logger.info(f"Message directory: {self.msg_dir}")
+        logger.info("Message directory: %s", self.msg_dir)
         # logger.info(f"Output directory: {self.output_dir}")
-        logger.info(f"Temporary directory: {self.tmp_dir}")
+        logger.info("Temporary directory: %s", self.tmp_dir)
 
     @staticmethod
     def _get_pon_from_msg(msg_filename: str) -> str:
@@ -39,31 +42,33 @@ class FileManager:
         :param msg_filename: Name of the .msg file.
         :return: Extracted PON number or None.
         """
-        pattern = r"PON_([\w\d]+)"
-        match = re.search(pattern, msg_filename)
+        match = _PON_RE.search(msg_filename)
         if match:
             return match.group(1)
-        logger.info(f"No PON number found in filename: {msg_filename}")
+        logger.info("No PON number found in filename: %s", msg_filename)
         return None
 
     @staticmethod
-    def _extract_pdfs_from_msg(msg_path: str, pdf_save_dir: str):
+    def _extract_pdfs_from_msg(msg_path: str, pdf_save_dir: str, msg_index: int):
         """
         Extracts PDF attachments from a .msg file and saves them to the designated directory.
+        Saved names are prefixed with the index of the .msg file, so they do not depend on thread timing.
 
         :param msg_path: Path to the .msg file.
         :param pdf_save_dir: Path to the directory where PDFs will be saved.
+        :param msg_index: Position of the .msg file in the sorted message directory.
         """
         try:
-            logger.info(f"Processing .msg file: {msg_path}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Processing .msg file: %s", msg_path)
             msg_file = Message(msg_path)
 
             for attachment in msg_file.attachments:
                 if attachment.longFilename.endswith('.pdf'):
-                    base_name, extension = os.path.splitext(attachment.longFilename)
-                    save_path = os.path.join(pdf_save_dir, attachment.longFilename)
+                    base_name, extension = os.path.splitext(f"{msg_index}_{attachment.longFilename}")
+                    save_path = os.path.join(pdf_save_dir, base_name + extension)
 
-                    # Ensure unique filenames
+                    # Ensure unique filenames, only attachments of this .msg file share the prefix
                     counter = 1
                     while os.path.exists(save_path):
                         new_name = f"{base_name}-{counter}{extension}"
@@ -73,9 +78,29 @@ class FileManager:
                     # Save PDF file
                     with open(save_path, 'wb') as pdf_file:
                         pdf_file.write(attachment.data)
-                    logger.info(f"PDF saved: {save_path}")
+                    if logger.isEnabledFor(logging.INFO):
+                        logger.info("PDF saved: %s", save_path)
         except Exception as e:
-            logger.error(f"Failed to extract PDFs from {msg_path}: {e}")
+            logger.error("Failed to extract PDFs from %s: %s", msg_path, e)
+
+    def _process_one_msg(self, entry: os.DirEntry, msg_index: int):
+        """
+        Extracts the PDFs of a single .msg file into the folder of its PON number.
+
+        :param entry: Directory entry of the .msg file in the message directory.
+        :param msg_index: Position of the .msg file in the sorted message directory.
+        """
+        pon_number = self._get_pon_from_msg(entry.name)
+        if not pon_number:
+            logger.warning("No PON number extracted from file: %s", entry.name)
+            return
+
+        # Create a directory for the PON number
+        pon_folder_path = os.path.join(self.tmp_dir, pon_number)
+        os.makedirs(pon_folder_path, exist_ok=True)
+
+        # Extract PDFs and save to the PON directory
+        self._extract_pdfs_from_msg(entry.path, pon_folder_path, msg_index)
 
     def process_msg_directory(self):
         """
@@ -83,37 +108,33 @@ class FileManager:
         and organizes them into folders based on PON numbers.
         """
         if not os.path.exists(self.msg_dir):
-            logger.warning(f"Message directory does not exist: {self.msg_dir}")
+            logger.warning("Message directory does not exist: %s", self.msg_dir)
             return
 
-        if not os.listdir(self.msg_dir):
+        with os.scandir(self.msg_dir) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+
+        if not entries:
             logger.info("No files found in the message directory.")
             return
 
         wrong_files = []
 
-        for filename in os.listdir(self.msg_dir):
-            try:
-                pon_number = self._get_pon_from_msg(filename)
-                if not pon_number:
-                    logger.warning(f"No PON number extracted from file: {filename}")
-                    continue
-
-                # Create a directory for the PON number
-                pon_folder_path = os.path.join(self.tmp_dir, pon_number)
-                os.makedirs(pon_folder_path, exist_ok=True)
-
-                # Extract PDFs and save to the PON directory
-                msg_path = os.path.join(self.msg_dir, filename)
-                self._extract_pdfs_from_msg(msg_path, pon_folder_path)
-            except Exception as e:
-                wrong_files.append((filename, str(e)))
-                logger.error(f"Error processing file {filename}: {e}")
+        with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 4) * 4)) as executor:
+            futures = {executor.submit(self._process_one_msg, entry, msg_index): entry.name
+                       for msg_index, entry in enumerate(entries)}
+            for future in as_completed(futures):
+                filename = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    wrong_files.append((filename, str(e)))
+                    logger.error("Error processing file %s: %s", filename, e)
 
         if wrong_files:
             logger.warning("Some files could not be processed:")
             for file, error in wrong_files:
-                logger.warning(f"File: {file}, Error: {error}")
+                logger.warning("File: %s, Error: %s", file, error)
 
     @staticmethod
     def clear_directory(directory_path: str):
@@ -123,23 +144,21 @@ class FileManager:
         :param directory_path: Path to the directory to clear.
         """
         if not os.path.exists(directory_path):
-            logger.warning(f"Directory does not exist: {directory_path}")
+            logger.warning("Directory does not exist: %s", directory_path)
             return
 
-        logger.info(f"Clearing directory: {directory_path}")
-        for root, dirs, files in os.walk(directory_path, topdown=False):
-            for file in files:
-                file_path = os.path.join(root, file)
-                try:
-                    os.remove(file_path)
-                except Exception as e:
-                    logger.error(f"Failed to delete file: {file_path}, {e}")
-
-            for dir in dirs:
-                dir_path = os.path.join(root, dir)
-                try:
-                    os.rmdir(dir_path)
-                except Exception as e:
-                    logger.error(f"Failed to delete folder: {dir_path}, {e}")
-
-        logger.info(f"Directory {directory_path} has been cleared.")
+        logger.info("Clearing directory: %s", directory_path)
+        with os.scandir(directory_path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    try:
+                        shutil.rmtree(entry.path)
+                    except Exception as e:
+                        logger.error("Failed to delete folder: %s, %s", entry.path, e)
+                else:
+                    try:
+                        os.remove(entry.path)
+                    except Exception as e:
+                        logger.error("Failed to delete file: %s, %s", entry.path, e)
+
+        logger.info("Directory %s has been cleared.", directory_path)
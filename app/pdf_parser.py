@@ -1,11 +1,22 @@
 import os
 import re
-import pdfplumber
 import logging
+from concurrent.futures import ProcessPoolExecutor
+import pypdfium2 as pdfium
+from utils import pdf_cache
+from utils.logging_config import setup_worker_logging, worker_log_queue
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
+_EXTRACTOR_VERSION = f"pypdfium2-{pdfium.version.PYPDFIUM_INFO}"
+
+_NAME_PHONE_RE = re.compile(r"INIT TEL NO\s+([\w\s]+)\s+(\d{3}-\d{3}-\d{4})")
+_EMAIL_RE = re.compile(r"IMPCON EMAIL MAIN TEL NO\s+([\w\.\-]+@[\w\.\-]+)")
+_DATE_RE = re.compile(r"FDT\s*\n(\d{2}-\d{2}-\d{4})")
+
+# PonDictCreator of the current worker process, set by _init_worker
+_worker_creator = None
+
 class PonDictCreator:
     """
     A class to process PDF files from a directory and create a PON dictionary.
@@ -19,86 +30,108 @@ class PonDictCreator:
         """
         self.config = config
         self.process_dir = config["directories"]["tmp_dir"]
+        self.cache_dir = config["directories"].get("cache_dir", "./_pdf_cache")
         self.full_dict = {}
 
+        circuits = config["tmo_circuits"]
+        self._evc_key = circuits["evc_uniq_keys"]
+        self._uni_keys = tuple(circuits["uni_uniq_keys"])
+        self._evc_header = circuits["evc_target_header"]
+        self._uni_header = circuits["uni_target_header"]
+        self._evc_re = re.compile(rf"\b\d+\.\b{self._evc_key}\.\S*\.")
+        self._uni_re = re.compile(rf"\b\d+\.\b(" + "|".join(self._uni_keys) + r")\.\S*\.")
+
         logger.info("Initialized PonDictCreator")
-        logger.info(f"Processing directory: {self.process_dir}")
+        logger.info("Processing directory: %s", self.process_dir)
 
     @staticmethod
-    def _extract_pdf_text(pdf_path: str) -> str:
+    def _read_pdf_text(pdf_path: str) -> str:
         """
-        Extracts text content from a PDF file.
+        Reads the raw text content of a PDF file with pypdfium2 (no layout analysis).
 
         :param pdf_path: Path to the PDF file.
         :return: Extracted text as a string.
         """
         text = ""
+        pdf = pdfium.PdfDocument(pdf_path)
         try:
-            logger.info(f"Extracting text from PDF: {pdf_path}")
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    text += page.extract_text() + "\n"
-            return text
-        except Exception as e:
-            logger.error(f"Failed to extract text from {pdf_path}: {e}")
-            return ""
-
-    def _parse_circuit_info(self, text: str) -> str:
-        """
-        Parses circuit information (EVC or UNI) from the extracted text.
-
-        :param text: Extracted text from PDF.
-        :return: Circuit information string.
+            for page in pdf:
+                # pdfium separates lines with CRLF, the parsers below expect LF
+                text += page.get_textpage().get_text_range().replace("\r\n", "\n") + "\n"
+        finally:
+            pdf.close()
+        return text
+
+    def _extract_pdf_text(self, pdf_path: str) -> str:
         """
-        evc_header = self.config['tmo_circuits']['evc_target_header']
-        uni_header = self.config['tmo_circuits']['uni_target_header']
-        evc_pattern = rf"\b\d+\.\b{self.config['tmo_circuits']['evc_uniq_keys']}\.\S*\."
-        uni_pattern = rf"\b\d+\.\b(" + "|".join(self.config['tmo_circuits']['uni_uniq_keys']) + r")\.\S*\."
-
-        def search_header(header, pattern):
-            if header in text:
-                lines = text.split("\n")
-                for i, line in enumerate(lines):
-                    if header in line and i + 1 < len(lines):
-                        match = re.search(pattern, lines[i + 1])
-                        if match:
-                            return match.group(0)
-            return None
-
-        # Try EVC header first, then UNI header
-        return search_header(evc_header, evc_pattern) or search_header(uni_header, uni_pattern)
+        Extracts text content from a PDF file, using the on-disk text cache when possible.
 
-    @staticmethod
-    def _parse_contact_info(text: str) -> dict:
-        """
-        Extracts contact information (name, phone, email) from the extracted text.
-
-        :param text: Extracted text from PDF.
-        :return: A dictionary containing contact details.
+        :param pdf_path: Path to the PDF file.
+        :return: Extracted text as a string.
         """
-        contact_info = {"name": None, "phone": None, "email": None}
-        name_phone_pattern = re.search(r"INIT TEL NO\s+([\w\s]+)\s+(\d{3}-\d{3}-\d{4})", text)
-        email_pattern = re.search(r"IMPCON EMAIL MAIN TEL NO\s+([\w\.\-]+@[\w\.\-]+)", text)
-
-        if name_phone_pattern:
-            contact_info["name"] = name_phone_pattern.group(1).strip()
-            contact_info["phone"] = name_phone_pattern.group(2).strip()
-        if email_pattern:
-            contact_info["email"] = email_pattern.group(1).strip()
-
-        return contact_info
+        try:
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Extracting text from PDF: %s", pdf_path)
+            return pdf_cache.get_text(pdf_path, self._read_pdf_text, self.cache_dir, _EXTRACTOR_VERSION)
+        except Exception as e:
+            logger.error("Failed to extract text from %s: %s", pdf_path, e)
+            return ""
 
-    @staticmethod
-    def _parse_date_info(text: str) -> str:
+    def _parse_all(self, text: str) -> dict:
         """
-        Parses the date from the extracted text.
+        Parses the date, contact information and circuit (EVC or UNI) from the extracted text
+        in a single pass over its lines.
 
         :param text: Extracted text from PDF.
-        :return: Extracted date string or None.
+        :return: A dictionary with date_sent, name, phone, email and circuit.
         """
-        pattern = r"FDT\s*\n(\d{2}-\d{2}-\d{4})"
-        match = re.search(pattern, text)
-        return match.group(1) if match else None
+        parsed = {"date_sent": None, "name": None, "phone": None, "email": None, "circuit": None}
+        evc_header, uni_header = self._evc_header, self._uni_header
+        evc_circuit = uni_circuit = None
+        date_done = contact_done = email_done = False
+
+        lines = text.split("\n")
+        offset = 0
+        for i, line in enumerate(lines):
+            # The patterns below may span lines, so they are searched in the full text starting
+            # from the first line containing their label; no earlier match is possible.
+            if not date_done and "FDT" in line:
+                date_done = True
+                match = _DATE_RE.search(text, offset)
+                if match:
+                    parsed["date_sent"] = match.group(1)
+
+            if not contact_done and "INIT TEL NO" in line:
+                contact_done = True
+                match = _NAME_PHONE_RE.search(text, offset)
+                if match:
+                    parsed["name"] = match.group(1).strip()
+                    parsed["phone"] = match.group(2).strip()
+
+            if not email_done and "IMPCON EMAIL MAIN TEL NO" in line:
+                email_done = True
+                match = _EMAIL_RE.search(text, offset)
+                if match:
+                    parsed["email"] = match.group(1).strip()
+
+            # Circuits are taken from the line following their header
+            if i + 1 < len(lines):
+                if evc_circuit is None and evc_header in line:
+                    match = self._evc_re.search(lines[i + 1])
+                    if match:
+                        evc_circuit = match.group(0)
+                if uni_circuit is None and uni_header in line:
+                    match = self._uni_re.search(lines[i + 1])
+                    if match:
+                        uni_circuit = match.group(0)
+
+            if date_done and contact_done and email_done and evc_circuit:
+                break
+            offset += len(line) + 1
+
+        # EVC takes precedence over UNI
+        parsed["circuit"] = evc_circuit or uni_circuit
+        return parsed
 
     def _create_pon_dict(self, process_dir) -> dict:
         """
@@ -155,36 +188,36 @@ class PonDictCreator:
                                             "contact_name": None, "contact_phone": None, "contact_email": None}
 
         try:
-            for item in os.listdir(process_dir):
-                
-                file_path = os.path.join(process_dir, item)
+            with os.scandir(process_dir) as entries:
+                file_paths = [entry.path for entry in entries if entry.is_file()]
+
+            for file_path in file_paths:
                 text =  self._extract_pdf_text(file_path)
-                date_info = self._parse_date_info(text)
-                contact_info = self._parse_contact_info(text)
-                cir = self._parse_circuit_info(text)
-                logger.info(f" Circuit found: {cir}")
+                parsed = self._parse_all(text)
+                date_info = parsed["date_sent"]
+                cir = parsed["circuit"]
                 
                 if date_info:
                     dict_pon["date_sent"] = date_info
 
-                if contact_info.get('name'):
-                    dict_pon["contact_name"] = contact_info['name']
-                if contact_info.get('phone'):
-                    dict_pon["contact_phone"] = contact_info['phone']
-                if contact_info.get('email'):
-                    dict_pon["contact_email"] = contact_info['email']
+                if parsed['name']:
+                    dict_pon["contact_name"] = parsed['name']
+                if parsed['phone']:
+                    dict_pon["contact_phone"] = parsed['phone']
+                if parsed['email']:
+                    dict_pon["contact_email"] = parsed['email']
                     
                 
-                if self.config["tmo_circuits"]["evc_uniq_keys"] in cir:
+                if self._evc_key in cir:
                     if dict_pon["evc1"] is None:  
                         dict_pon["evc1"] = cir
                     else:  
                         dict_pon["evc2"] = cir
                 
-                elif any(key in cir for key in self.config["tmo_circuits"]["uni_uniq_keys"]):
+                elif any(key in cir for key in self._uni_keys):
                     dict_pon["uni"] = cir
                 
-                else: logger.error(f" Circuit is not found: {cir}")
+                else: logger.error(" Circuit is not found: %s", cir)
 
         except Exception as e: logger.error(e)   
 
@@ -194,7 +227,46 @@ class PonDictCreator:
 
 
     def create_full_dict(self) -> dict:
-        for item in os.listdir(self.process_dir):
-            new = self._create_pon_dict(os.path.join(self.process_dir, item))
-            self.full_dict.update(new)
-        return self.full_dict
\ No newline at end of file
+        """
+        Processes every PON directory in parallel worker processes and merges the results.
+
+        :return: A dictionary containing the data of all PONs.
+        """
+        with os.scandir(self.process_dir) as entries:
+            dirs = [entry.path for entry in entries if entry.is_dir()]
+        if not dirs:
+            return self.full_dict
+
+        log_level = logging.getLogger().getEffectiveLevel()
+        workers = min(len(dirs), os.cpu_count() or 1)
+        # About four chunks per worker keeps every process busy while still batching small directories
+        chunksize = max(1, len(dirs) // (workers * 4))
+        with worker_log_queue() as log_queue, \
+                ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                    initargs=(self.config, log_queue, log_level)) as executor:
+            for new in executor.map(_process_pon_dir, dirs, chunksize=chunksize):
+                self.full_dict.update(new)
+        return self.full_dict
+
+
+def _init_worker(config: dict, log_queue, log_level: int):
+    """
+    Routes the logging of a worker process to the parent and creates its PonDictCreator.
+
+    :param config: Configuration dictionary.
+    :param log_queue: Queue collecting the worker log records.
+    :param log_level: Logging level of the parent process.
+    """
+    global _worker_creator
+    setup_worker_logging(log_queue, log_level)
+    _worker_creator = PonDictCreator(config)
+
+
+def _process_pon_dir(process_dir: str) -> dict:
+    """
+    Creates the dictionary of a single PON directory inside a worker process.
+
+    :param process_dir: Path to the PON directory.
+    :return: A dictionary containing extracted and processed data.
+    """
+    return _worker_creator._create_pon_dict(process_dir)
@@ -1,13 +1,26 @@
 import logging
+import multiprocessing
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from app.config import Config
 from app.data_processer import PonDictProcessor
 from app.pdf_parser import PonDictCreator
-from app.exporter import Exporter
+from app.exporter import Exporter, XlsxWriterExporter
 from app.file_manager import FileManager
 from utils.logging_config import setup_logging
 
+def _move_pon(tmp_dir, sites_path, pon):
+    pon_path = os.path.join(sites_path, pon)
+    if os.path.exists(pon_path):
+        return
+    try:
+        os.replace(os.path.join(tmp_dir, pon), pon_path)
+    except OSError:
+        # Different file systems, fall back to copy + delete
+        shutil.move(os.path.join(tmp_dir, pon), pon_path)
+
 def main():
     setup_logging()
     logger = logging.getLogger(__name__)
@@ -17,7 +30,10 @@ def main():
     file_manager = FileManager(config)
     creator = PonDictCreator(config)
     processor = PonDictProcessor(config)
-    exporter = Exporter(config)
+    if config["config_templates"].get("engine") == "xlsxwriter":
+        exporter = XlsxWriterExporter(config)
+    else:
+        exporter = Exporter(config)
 
     # customer = config["config_templates"]["customer"]
     output_dir = config["directories"]["output_dir"]
@@ -33,25 +49,22 @@ def main():
     pon_dict = creator.create_full_dict()
     final_dict = processor.process(pon_dict)
     
-    for k, val in final_dict.items():
-        
-        for key, value in val.items():
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for k, val in final_dict.items():
             
-            basic_path = os.path.join(output_dir, k, key)
-            sites_path = os.path.join(basic_path, f"{len(value)}-SITES")
-            os.makedirs(basic_path, exist_ok=True)
-            os.makedirs(sites_path, exist_ok=True)
-
-            for pon in value.keys():
-                pon_path = os.path.join(sites_path, pon)
-                if os.path.exists(pon_path):
-                    pass
-                else: shutil.move(os.path.join(tmp_dir, pon), pon_path)
-
-            excel_output_path = f"{basic_path}/CONFIGURATOR-{key}-{k}-{len(value)}-SITES{file_format}" 
-            exporter.export(value, excel_output_path)
+            for key, value in val.items():
+                
+                basic_path = os.path.join(output_dir, k, key)
+                sites_path = os.path.join(basic_path, f"{len(value)}-SITES")
+                os.makedirs(sites_path, exist_ok=True)
+
+                list(executor.map(partial(_move_pon, tmp_dir, sites_path), value.keys()))
+
+                excel_output_path = f"{basic_path}/CONFIGURATOR-{key}-{k}-{len(value)}-SITES{file_format}" 
+                exporter.export(value, excel_output_path)
     
     logger.info("Script finished successfully. Enjoy =)")
     
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
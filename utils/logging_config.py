@@ -1,6 +1,27 @@
 import os
+import queue
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import multiprocessing
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Listener writing the records queued by the root logger, started by setup_logging
+_listener = None
+
+
+def _stop_listener():
+    """
+    Flushes the queued records and stops the listener thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(_stop_listener)
+
 
 def setup_logging(log_level=logging.INFO):
     """
@@ -8,6 +29,9 @@ def setup_logging(log_level=logging.INFO):
 
     :param log_level: Logging level (default is logging.INFO)
     """
+    global _listener
+    _stop_listener()
+
     log_directory = "logs"
     os.makedirs(log_directory, exist_ok=True)
     log_file_path = os.path.join(log_directory, "app.log")
@@ -35,7 +59,52 @@ def setup_logging(log_level=logging.INFO):
     console_handler.setFormatter(log_formatter)
     console_handler.setLevel(log_level)
 
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # Handlers run on the listener thread, log calls only put records on the queue
+    log_queue = queue.Queue(-1)
+    logger.addHandler(QueueHandler(log_queue))
+    _listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+
+    # Route warnings.warn() output (e.g. from polars) through the same handlers
+    logging.captureWarnings(True)
 
     logger.info("Logging is set up and log file cleared.")
+
+
+class _ForwardHandler(logging.Handler):
+    """
+    Hands records received from worker processes to the logger that emitted them.
+    """
+
+    def emit(self, record):
+        logging.getLogger(record.name).handle(record)
+
+
+@contextmanager
+def worker_log_queue():
+    """
+    Collects log records of worker processes while the context is active.
+
+    :return: Queue to pass to setup_worker_logging in the workers.
+    """
+    log_queue = multiprocessing.Queue(-1)
+    listener = QueueListener(log_queue, _ForwardHandler())
+    listener.start()
+    try:
+        yield log_queue
+    finally:
+        listener.stop()
+        log_queue.close()
+
+
+def setup_worker_logging(log_queue, log_level=logging.INFO):
+    """
+    Sends the log records of a worker process to the queue of worker_log_queue.
+
+    :param log_queue: Queue returned by worker_log_queue.
+    :param log_level: Logging level (default is logging.INFO)
+    """
+    logger = logging.getLogger()
+    logger.setLevel(log_level)
+    logger.handlers.clear()
+    logger.addHandler(QueueHandler(log_queue))
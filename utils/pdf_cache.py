@@ -0,0 +1,60 @@
+import os
+import hashlib
+import logging
+import zstandard
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def _file_digest(file_path: str) -> str:
+    """
+    Computes the SHA-256 digest of a file, reading it in 1 MiB chunks.
+
+    :param file_path: Path to the file.
+    :return: Hex digest string.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_text(pdf_path: str, extract, cache_dir: str, version: str) -> str:
+    """
+    Returns the text of a PDF file, reusing a previous extraction when the file content
+    and the extractor version are unchanged.
+
+    :param pdf_path: Path to the PDF file.
+    :param extract: Callable extracting text from a PDF path, used on cache miss.
+    :param cache_dir: Directory holding the compressed text files.
+    :param version: Extractor version, part of the cache key.
+    :return: Extracted text as a string.
+    """
+    cache_path = os.path.join(cache_dir, f"{_file_digest(pdf_path)}-{version}.txt.zst")
+
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, "rb") as file:
+                return zstandard.ZstdDecompressor().decompress(file.read()).decode("utf-8")
+        except Exception as e:
+            logger.warning("Ignoring unreadable cache entry %s: %s", cache_path, e)
+
+    text = extract(pdf_path)
+
+    # A failed store only costs the next run a re-extraction, the text is returned regardless
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(tmp_path, "wb") as file:
+            file.write(zstandard.ZstdCompressor(level=3).compress(text.encode("utf-8")))
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        logger.warning("Could not store cache entry %s: %s", cache_path, e)
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+    return text